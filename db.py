@@ -5,8 +5,6 @@ import sqlite3
 
 from parsing.anchors import Anchor
 
-from util import debug
-
 def collate_lowercase(s1, s2):
     s1 = s1.lower()
     s2 = s2.lower()
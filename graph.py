@@ -0,0 +1,350 @@
+"""Provides streaming export of the link graph.
+
+Links are read file by file and written out as they are found, so the
+graph is never held in memory as a whole. Deduplication and edge weights
+need to remember what has been seen; they use ``SpillSet`` and
+``SpillCounter``, which keep a bounded number of items in memory and move
+the rest to a temporary SQLite database.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+from glob import iglob
+
+from parsing.anchors import Anchor, AnchorParser, Synonym, SynonymParser
+from parsing.references import Reference, ReferenceParser
+from parsing.util import MultiParser
+
+
+# Bounded memory containers #
+class _Spill:
+    """Common parts of ``SpillSet`` and ``SpillCounter``.
+
+    Items are tuples of strings, all of the same length. They are kept
+    in memory until there are more than ``limit`` of them; then they are
+    moved to a temporary database on disk, one column per tuple element.
+    """
+
+    def __init__(self, limit=100000):
+        self.limit = limit
+        self.width = None
+        self.conn = None
+
+    def _check(self, item):
+        if self.width is None:
+            self.width = len(item)
+        elif len(item) != self.width:
+            raise ValueError("expected {} elements, got {!r}".format(self.width, item))
+
+    @property
+    def _columns(self):
+        return ['c{}'.format(i) for i in range(self.width)]
+
+    def _connect(self):
+        if self.conn is None:
+            handle, self.spillpath = tempfile.mkstemp(suffix='.db')
+            os.close(handle)
+            self.conn = sqlite3.connect(self.spillpath)
+            columns = self._columns
+            self.conn.execute('CREATE TABLE items({}, count INTEGER, PRIMARY KEY ({}))'.format(
+                    ', '.join(c + ' TEXT NOT NULL' for c in columns), ', '.join(columns)))
+        return self.conn
+
+    def close(self):
+        """Remove the spill file, if there is one."""
+        if self.conn is not None:
+            self.conn.close()
+            os.remove(self.spillpath)
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SpillSet(_Spill):
+    """A set that spills to disk.
+
+    >>> seen = SpillSet(limit=2)
+    >>> [seen.add(item) for item in [("a",), ("b",), ("c",), ("a",), ("c",)]]
+    [True, True, True, False, False]
+    >>> seen.close()
+    """
+
+    def __init__(self, limit=100000):
+        super().__init__(limit)
+        self.items = set()
+
+    def __contains__(self, item):
+        if item in self.items:
+            return True
+        if self.conn is None:
+            return False
+        cur = self.conn.execute('SELECT 1 FROM items WHERE {}'.format(
+                ' AND '.join(c + '=?' for c in self._columns)), item)
+        return cur.fetchone() is not None
+
+    def add(self, item):
+        """Add ``item``; return ``True`` if it wasn't there before."""
+        self._check(item)
+        if item in self:
+            return False
+        self.items.add(tuple(item))
+        if len(self.items) > self.limit:
+            self._spill()
+        return True
+
+    def _spill(self):
+        with self._connect() as conn:
+            conn.executemany('INSERT INTO items VALUES ({}, 1)'.format(
+                    ', '.join('?' * self.width)), self.items)
+        self.items.clear()
+
+
+class SpillCounter(_Spill):
+    """Counts items, spilling to disk.
+
+    >>> counter = SpillCounter(limit=1)
+    >>> for item in [("a", "b"), ("a", "c"), ("a", "b")]:
+    ...     counter.add(item)
+    >>> list(counter.counts())
+    [(('a', 'b'), 2), (('a', 'c'), 1)]
+    >>> counter.close()
+    """
+
+    def __init__(self, limit=100000):
+        super().__init__(limit)
+        self.items = {}
+
+    def add(self, item):
+        self._check(item)
+        item = tuple(item)
+        self.items[item] = self.items.get(item, 0) + 1
+        if len(self.items) > self.limit:
+            self._spill()
+
+    def _spill(self):
+        with self._connect() as conn:
+            conn.executemany('''INSERT INTO items VALUES ({}, ?)
+                                ON CONFLICT ({}) DO UPDATE SET count = count + excluded.count'''
+                                .format(', '.join('?' * self.width), ', '.join(self._columns)),
+                             (item + (count,) for item, count in self.items.items()))
+        self.items.clear()
+
+    def counts(self):
+        """Yield ``(item, count)`` pairs, sorted by item."""
+        if self.conn is None:
+            for item in sorted(self.items):
+                yield item, self.items[item]
+            return
+        self._spill()
+        columns = ', '.join(self._columns)
+        for row in self.conn.execute('SELECT {}, count FROM items ORDER BY {}'.format(columns, columns)):
+            yield tuple(row[:-1]), row[-1]
+
+
+# Output formats #
+class GraphWriter:
+    """Writes nodes and edges to a text stream.
+
+    Subclasses override ``begin()``, ``node()``, ``edge()`` and ``end()``.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def begin(self):
+        pass
+
+    def node(self, name):
+        pass
+
+    def edge(self, source, target, weight=None):
+        pass
+
+    def end(self):
+        pass
+
+
+class DotWriter(GraphWriter):
+    r"""Writes a graphviz ``digraph``.
+
+    >>> import sys
+    >>> w = DotWriter(sys.stdout)
+    >>> w.begin(); w.node('Say "hi"'); w.edge("A", "B", 2); w.end()
+    digraph g {
+    node [shape=none]; overlap=false;
+    "Say \"hi\"";
+    "A" -> "B" [weight=2];
+    }
+    """
+
+    def quote(self, name):
+        return '"{}"'.format(name.replace('\\', '\\\\').replace('"', '\\"'))
+
+    def begin(self):
+        self.stream.write('digraph g {\nnode [shape=none]; overlap=false;\n')
+
+    def node(self, name):
+        self.stream.write('{};\n'.format(self.quote(name)))
+
+    def edge(self, source, target, weight=None):
+        attributes = ' [weight={}]'.format(weight) if weight is not None else ''
+        self.stream.write('{} -> {}{};\n'.format(
+                self.quote(source), self.quote(target), attributes))
+
+    def end(self):
+        self.stream.write('}\n')
+
+
+class JsonLinesWriter(GraphWriter):
+    """Writes one JSON object per node and per edge.
+
+    >>> import sys
+    >>> w = JsonLinesWriter(sys.stdout)
+    >>> w.node("A"); w.edge("A", "B"); w.edge("A", "C", 3)
+    {"node": "A"}
+    {"source": "A", "target": "B"}
+    {"source": "A", "target": "C", "weight": 3}
+    """
+
+    def node(self, name):
+        self.stream.write(json.dumps({'node': name}) + '\n')
+
+    def edge(self, source, target, weight=None):
+        obj = {'source': source, 'target': target}
+        if weight is not None:
+            obj['weight'] = weight
+        self.stream.write(json.dumps(obj) + '\n')
+
+
+class TsvWriter(GraphWriter):
+    """Writes a plain edge list, one tab separated edge per line.
+
+    >>> from io import StringIO
+    >>> w = TsvWriter(StringIO())
+    >>> w.node("A"); w.edge("A", "B"); w.edge("A", "C", 3)
+    >>> w.stream.getvalue()
+    'A\\tB\\nA\\tC\\t3\\n'
+    """
+
+    def edge(self, source, target, weight=None):
+        fields = (source, target) if weight is None else (source, target, str(weight))
+        self.stream.write('\t'.join(fields) + '\n')
+
+
+WRITERS = {
+    'dot': DotWriter,
+    'jsonl': JsonLinesWriter,
+    'tsv': TsvWriter,
+}
+
+
+# Reading and exporting #
+def find_files(patterns):
+    """Return the sorted names of all files matching any of the glob ``patterns``.
+
+    ``**`` in a pattern matches any number of directories.
+    Directories themselves are skipped.
+    """
+    return sorted({f for pattern in patterns for f in iglob(pattern, recursive=True)
+                     if os.path.isfile(f)})
+
+def _sections(parser, filename):
+    """Split ``filename`` into one section per anchor.
+
+    Yields ``(name, aliases, targets)`` for each section: the anchor's
+    name, the lowercased set of its names (including those added by
+    synonyms), and the targets of the references made from it.
+    Text before the first anchor is a section named ``---``, and is
+    only yielded if it contains references.
+    """
+    name, aliases, targets = '---', {'---'}, []
+    for item in parser.parse_file(filename):
+        if isinstance(item, Anchor):
+            if name != '---' or targets:
+                yield name, aliases, targets
+            name = item.name
+            aliases = {name.lower()} | {a.lower() for a in item.aliases}
+            targets = []
+        elif isinstance(item, Synonym):
+            aliases.update(a.lower() for a in item.aliases)
+        elif isinstance(item, Reference):
+            targets.append(item.target)
+        else:
+            raise Exception(str(item))
+    if name != '---' or targets:
+        yield name, aliases, targets
+
+def alias_groups(filenames, anchors):
+    """Return ``anchors`` together with all other names of the anchors they name.
+
+    Only anchors and synonyms are read, not references.
+    ``anchors`` should be a set of lowercased names; so is the result.
+    """
+    parser = MultiParser(AnchorParser(), SynonymParser())
+    names = set(anchors)
+    for filename in filenames:
+        for _, aliases, _ in _sections(parser, filename):
+            if aliases & anchors:
+                names |= aliases
+    return names
+
+def iter_links(filenames, anchors=None):
+    """Yield ``(anchor, None)`` for every anchor and ``(anchor, target)``
+    for every reference found in ``filenames``.
+
+    References that come before the first anchor in a file are attributed
+    to an anchor named ``---``.
+
+    If ``anchors`` is given, it should be a set of lowercased names;
+    then only anchors with one of those names (or aliases) are yielded,
+    together with the references made from them, and the references made
+    to any of their names. To know all names, the files are read twice.
+
+    An anchor is always yielded before its references, so every source
+    has a node. The references of one anchor are kept in memory until the
+    next anchor starts, because a later synonym may still select it.
+    """
+    if anchors is not None:
+        anchors = alias_groups(filenames, anchors)
+    parser = MultiParser(AnchorParser(), SynonymParser(), ReferenceParser())
+
+    for filename in filenames:
+        for name, aliases, targets in _sections(parser, filename):
+            if anchors is None or aliases & anchors:
+                selected = targets
+                announce = True
+            else:
+                selected = [t for t in targets if t.lower() in anchors]
+                announce = bool(selected)
+            if announce:
+                yield name, None
+            for target in selected:
+                yield name, target
+
+def export(links, writer, dedup=False, weights=False, limit=100000):
+    """Write ``links`` (as yielded by ``iter_links()``) using ``writer``.
+
+    With ``dedup``, every node and edge is written only once.
+    With ``weights``, edges are also deduplicated, and written after all
+    nodes, each with the number of times it occurred as its weight.
+    At most ``limit`` nodes and ``limit`` edges are kept in memory for this.
+    """
+    with SpillSet(limit) as nodes, SpillSet(limit) as edges, SpillCounter(limit) as counter:
+        writer.begin()
+        for source, target in links:
+            if target is None:
+                if not dedup or nodes.add((source,)):
+                    writer.node(source)
+            elif weights:
+                counter.add((source, target))
+            elif not dedup or edges.add((source, target)):
+                writer.edge(source, target)
+        for (source, target), count in counter.counts():
+            writer.edge(source, target, count)
+        writer.end()
@@ -0,0 +1,168 @@
+import unittest
+
+# The module we're testing.
+import graph
+
+# Additional modules
+import json
+import os
+from io import StringIO
+from notes_tests import TestNotebook
+
+LINKS = [
+    ("A", None),
+    ("A", "B"),
+    ("A", "B"),
+    ("A", "C"),
+    ("B", None),
+    ("A", None),
+    ("B", "A"),
+]
+
+class TestExport(unittest.TestCase):
+
+    def export(self, fmt, **kwargs):
+        stream = StringIO()
+        graph.export(iter(LINKS), graph.WRITERS[fmt](stream), **kwargs)
+        return stream.getvalue().splitlines()
+
+    def test_plain(self):
+        """Without options, links are written as they come."""
+        lines = self.export("tsv")
+        self.assertEqual(lines, ["A\tB", "A\tB", "A\tC", "B\tA"])
+
+    def test_dedup(self):
+        lines = self.export("dot", dedup=True)
+        self.assertEqual(lines[2:-1], ['"A";', '"A" -> "B";', '"A" -> "C";',
+                                       '"B";', '"B" -> "A";'])
+
+    def test_weights(self):
+        lines = [json.loads(line) for line in self.export("jsonl", weights=True)]
+        self.assertEqual(lines, [
+            {"node": "A"},
+            {"node": "B"},
+            {"node": "A"},
+            {"source": "A", "target": "B", "weight": 2},
+            {"source": "A", "target": "C", "weight": 1},
+            {"source": "B", "target": "A", "weight": 1},
+        ])
+
+    def test_spill(self):
+        """Results don't depend on how much is kept in memory."""
+        for options in ({"dedup": True}, {"weights": True}, {"dedup": True, "weights": True}):
+            self.assertEqual(self.export("tsv", limit=1, **options),
+                             self.export("tsv", **options))
+
+
+class TestSpill(unittest.TestCase):
+
+    def test_spill_file_removed(self):
+        with graph.SpillSet(limit=1) as seen:
+            seen.add(("a",))
+            seen.add(("b",))
+            spillpath = seen.spillpath
+            self.assertTrue(os.path.exists(spillpath))
+            self.assertIn(("a",), seen)
+            self.assertNotIn(("c",), seen)
+        self.assertFalse(os.path.exists(spillpath))
+
+    def test_counter_merges_spilled(self):
+        with graph.SpillCounter(limit=1) as counter:
+            for item in [("a", "b"), ("c", "d"), ("a", "b"), ("a", "b")]:
+                counter.add(item)
+            self.assertEqual(dict(counter.counts()),
+                             {("a", "b"): 3, ("c", "d"): 1})
+
+    def test_any_characters(self):
+        """Items survive spilling, whatever characters they contain."""
+        items = [("a\x1fb", "c"), ("a", "b\x1fc"), ("a\tb", "\n")]
+        with graph.SpillSet(limit=1) as seen, graph.SpillCounter(limit=1) as counter:
+            for item in items:
+                self.assertTrue(seen.add(item))
+                counter.add(item)
+            for item in items:
+                self.assertIn(item, seen)
+            self.assertEqual(dict(counter.counts()), {item: 1 for item in items})
+
+    def test_mixed_lengths(self):
+        with graph.SpillSet() as seen:
+            seen.add(("a",))
+            with self.assertRaisesRegex(ValueError, "expected 1 elements"):
+                seen.add(("a", "b"))
+
+
+class TestIterLinks(TestNotebook):
+    """Read links from a temporary notebook."""
+
+    files = {
+        "a.txt": "^Outside^ |A| refers to ^B^ and ^Nowhere^.\n"
+                 "|Other| (|alias of other|) refers to ^C^.\n",
+        "b.txt": "|B| refers to ^a^.\n",
+        os.path.join("sub", "c.md"): "|C| refers to ^Other^.\n",
+    }
+
+    def links(self, patterns, anchors=None):
+        return list(graph.iter_links(graph.find_files(patterns), anchors))
+
+    def test_find_files(self):
+        self.assertEqual(graph.find_files(["*.txt"]), ["a.txt", "b.txt"])
+        self.assertEqual(graph.find_files(["**/*.md", "b.*"]),
+                         ["b.txt", os.path.join("sub", "c.md")])
+        self.assertEqual(graph.find_files(["s*"]), [])
+
+    def test_all(self):
+        self.assertEqual(self.links(["a.txt"]), [
+            ("---", None), ("---", "Outside"),
+            ("A", None), ("A", "B"), ("A", "Nowhere"),
+            ("Other", None), ("Other", "C"),
+        ])
+
+    def test_anchor(self):
+        """Selected anchors come with their references, and references to them."""
+        self.assertEqual(self.links(["*.txt"], {"a"}), [
+            ("A", None), ("A", "B"), ("A", "Nowhere"),
+            ("B", None), ("B", "a"),
+        ])
+
+    def test_synonym(self):
+        """An anchor selected by a synonym still gets its node."""
+        self.assertEqual(self.links(["*.txt"], {"alias of other"}),
+                         [("Other", None), ("Other", "C")])
+
+    def test_reference_into_selection(self):
+        """The source of a reference into the selection gets a node."""
+        self.assertEqual(self.links(["**/*"], {"other"}), [
+            ("Other", None), ("Other", "C"),
+            ("C", None), ("C", "Other"),
+        ])
+
+
+class TestSelection(TestNotebook):
+    """Select anchors by any of their names."""
+
+    files = {
+        "a.txt": "|Foo| refers to ^Bar^ (|Baz|) and ^Qux^.\n"
+                 "|Zed| refers to ^baz^ and ^Other^.\n",
+        "b.txt": "|(the) A anchor| and ^A anchor^.\n",
+    }
+
+    def links(self, *anchors):
+        return list(graph.iter_links(["a.txt", "b.txt"], set(anchors)))
+
+    def test_reference_before_synonym(self):
+        """References before the synonym that selects an anchor are kept."""
+        self.assertEqual(self.links("baz"),
+                         [("Foo", None), ("Foo", "Bar"), ("Foo", "Qux"),
+                          ("Zed", None), ("Zed", "baz")])
+
+    def test_reference_to_alias(self):
+        """References to any name of a selected anchor are kept."""
+        self.assertEqual(self.links("foo"),
+                         [("Foo", None), ("Foo", "Bar"), ("Foo", "Qux"),
+                          ("Zed", None), ("Zed", "baz")])
+        self.assertEqual(self.links("the a anchor"),
+                         [("(the) A anchor", None), ("(the) A anchor", "A anchor")])
+
+    def test_alias_groups(self):
+        self.assertEqual(graph.alias_groups(["a.txt", "b.txt"], {"foo", "nothing"}),
+                         {"foo", "baz", "nothing"})
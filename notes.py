@@ -1,14 +1,24 @@
 #!/bin/env python3
 
+import os
 import sys
 from glob import iglob
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 
 from parsing.anchors import Anchor, AnchorParser, Synonym, SynonymParser, AnchorTagRenderer
 from parsing.util import MultiParser
-from parsing.references import Reference, ReferenceParser
+from parsing.references import ReferenceParser
+from snapshot import SnapshotWriter
+from graph import WRITERS, export, find_files, iter_links
 
-def get_arguments():
+def positive_int(string):
+    """Argument type for integers of at least 1."""
+    value = int(string)
+    if value < 1:
+        raise ArgumentTypeError("must be at least 1, not {}".format(value))
+    return value
+
+def get_arguments(argv=None):
     parser = ArgumentParser(description="Handle notes, my way.")
     subparsers = parser.add_subparsers(title="Commands")
 
@@ -17,47 +27,78 @@ def get_arguments():
 
     mklinks = subparsers.add_parser("links", help="print links")
     mklinks.set_defaults(func=cmd_mklinks)
+    mklinks.add_argument("-f", "--format", choices=sorted(WRITERS), default="dot",
+            help="output format (default: %(default)s)")
+    mklinks.add_argument("-o", "--output", default="-",
+            help="output file (default: standard output)")
+    mklinks.add_argument("-g", "--glob", action="append",
+            help="only read files matching this pattern; may be repeated (default: *.txt)")
+    mklinks.add_argument("-a", "--anchor", action="append",
+            help="only export this anchor and its links; may be repeated")
+    mklinks.add_argument("--dedup", action="store_true",
+            help="write every node and edge only once")
+    mklinks.add_argument("--weights", action="store_true",
+            help="merge duplicate edges and weight them by their count")
+    mklinks.add_argument("--memory-limit", type=positive_int, default=100000, metavar="ITEMS",
+            help="nodes and edges to keep in memory before spilling to disk "
+                 "(default: %(default)s)")
+    mklinks.add_argument("--buffer-size", type=positive_int, default=1 << 16, metavar="BYTES",
+            help="output buffer size (default: %(default)s)")
 
     #parser.set_defaults(func=cmd_mktags)
-    return parser.parse_args()
+    return parser.parse_args(argv)
 
-def cmd_mktags():
-    parser = AnchorParser()
+def cmd_mktags(args):
+    parser = MultiParser(AnchorParser(), SynonymParser(), ReferenceParser())
 
     anchors = set()
+    references = []
     for filename in iglob('*.txt'):
-        new_anchors = parser.parse_file(filename)
-        anchors.update(new_anchors)
+        current_anchor = None
+        for item in parser.parse_file(filename):
+            if isinstance(item, Anchor):
+                current_anchor = item
+                anchors.add(item)
+            elif current_anchor is None:
+                continue
+            elif isinstance(item, Synonym):
+                current_anchor.aliases.update(item.aliases)
+            else:
+                references.append((current_anchor, item.target))
 
     renderer = AnchorTagRenderer()
     lines = renderer.render_anchors(anchors)
     with open('tags', 'w') as tf:
         tf.writelines(lines)
 
-def cmd_mklinks():
-    class NS: pass
-    parser = MultiParser(AnchorParser(), SynonymParser(), ReferenceParser())
+    snapshot = SnapshotWriter()
+    for anchor in anchors:
+        snapshot.define_anchor(anchor.name, anchor.path, anchor.definition, anchor.aliases)
+    for anchor, target in references:
+        snapshot.add_reference(anchor.path, anchor.definition, target)
+    snapshot.write('notes.snap')
 
-    print("digraph g {")
-    print("node [shape=none]; overlap=false;")
-    current_anchor = NS()
-    current_anchor.name = "---"
-    current_anchor.aliases = set()
-    for filename in iglob('*.txt'):
-        for item in parser.parse_file(filename):
-            if isinstance(item, Anchor):
-                current_anchor = item
-                print('"{}"'.format(item.name))
-            elif isinstance(item, Synonym):
-                current_anchor.aliases.update(item.aliases)
-                debug(item.aliases)
-            elif isinstance(item, Reference):
-                print('"{}" -> "{}";'.format(current_anchor.name, item.target))
-            else:
-                raise Exception(str(item))
-    print("}")
+def cmd_mklinks(args):
+    filenames = find_files(args.glob or ['*.txt'])
+    anchors = {a.lower() for a in args.anchor} if args.anchor else None
+    links = iter_links(filenames, anchors)
+
+    if args.output == '-':
+        stream = open(sys.stdout.fileno(), 'w', buffering=args.buffer_size, closefd=False)
+    else:
+        stream = open(args.output, 'w', buffering=args.buffer_size)
+    try:
+        with stream:
+            writer = WRITERS[args.format](stream)
+            export(links, writer, dedup=args.dedup, weights=args.weights, limit=args.memory_limit)
+    except BrokenPipeError:
+        # The reader went away (e.g. ``notes.py links | head``). Python flushes
+        # stdout again on exit, so point it at devnull to keep that quiet.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
 
 
 if __name__ == "__main__":
     args = get_arguments()
-    args.func()
+    args.func(args)
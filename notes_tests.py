@@ -0,0 +1,112 @@
+import unittest
+
+# The module we're testing.
+import notes
+
+# Additional modules
+import json
+import os
+import tempfile
+from contextlib import redirect_stderr
+from io import StringIO
+from snapshot import Snapshot
+
+class TestNotebook(unittest.TestCase):
+    """Run commands in a temporary notebook directory."""
+
+    files = {}
+
+    def setUp(self):
+        self.olddir = os.getcwd()
+        self.directory = tempfile.TemporaryDirectory()
+        os.chdir(self.directory.name)
+        for name, text in self.files.items():
+            if os.path.dirname(name):
+                os.makedirs(os.path.dirname(name), exist_ok=True)
+            with open(name, 'w') as f:
+                f.write(text)
+
+    def tearDown(self):
+        os.chdir(self.olddir)
+        self.directory.cleanup()
+
+
+class TestMkTags(TestNotebook):
+
+    files = {
+        "a.txt": "This is |(the) A anchor|, pointing to ^B^.\n",
+        "b.txt": "And this is |B|.\n",
+        "c.txt": "This |anchor spans\ntwo lines|.\n",
+        "d.txt": "|Foo| (|Baz|) refers to ^Bar^.\n",
+    }
+
+    def setUp(self):
+        super().setUp()
+        notes.cmd_mktags(None)
+
+    def test_tags(self):
+        with open("tags") as f:
+            names = [line.split('\t')[0] for line in f]
+        self.assertEqual(names, ["(the) A anchor", "A anchor", "B", "Baz", "Foo",
+                                 "anchor spans two lines", "the A anchor"])
+
+    def test_snapshot(self):
+        with Snapshot("notes.snap") as snap:
+            self.assertEqual(snap.find_anchors("a anchor"),
+                             [("(the) A anchor", "a.txt", "|(the) A anchor|")])
+            self.assertEqual(list(snap.get_references("a.txt", "|(the) A anchor|")),
+                             ["B"])
+            self.assertEqual(snap.find_anchors("b"), [("B", "b.txt", "|B|")])
+
+    def test_synonym(self):
+        """Synonyms are added to the preceding anchor's alias group."""
+        with Snapshot("notes.snap") as snap:
+            self.assertEqual(snap.find_anchors("baz"), [("Foo", "d.txt", "|Foo|")])
+            self.assertEqual(sorted(snap.get_anchor_names("d.txt", "|Foo|")), ["Baz", "Foo"])
+            self.assertEqual(list(snap.get_references("d.txt", "|Foo|")), ["Bar"])
+
+    def test_multiline_anchor(self):
+        with Snapshot("notes.snap") as snap:
+            self.assertEqual(snap.find_anchors("anchor spans two lines"),
+                             [("anchor spans two lines", "c.txt", "|anchor spans\ntwo lines|")])
+
+
+class TestMkLinks(TestNotebook):
+
+    files = {
+        "a.txt": "|A| refers to ^B^, ^B^ and ^C^.\n",
+        "b.txt": "|B| refers to ^A^.\n",
+        "c.md": "|C| refers to ^B^.\n",
+    }
+
+    def mklinks(self, *argv):
+        args = notes.get_arguments(["links", "-o", "out"] + list(argv))
+        args.func(args)
+        with open("out") as f:
+            return f.read().splitlines()
+
+    def test_dot(self):
+        self.assertEqual(self.mklinks(), [
+            'digraph g {', 'node [shape=none]; overlap=false;',
+            '"A";', '"A" -> "B";', '"A" -> "B";', '"A" -> "C";',
+            '"B";', '"B" -> "A";',
+            '}'])
+
+    def test_jsonl_weights(self):
+        lines = [json.loads(line) for line in self.mklinks("-f", "jsonl", "--weights")]
+        self.assertEqual(lines, [
+            {"node": "A"}, {"node": "B"},
+            {"source": "A", "target": "B", "weight": 2},
+            {"source": "A", "target": "C", "weight": 1},
+            {"source": "B", "target": "A", "weight": 1},
+        ])
+
+    def test_tsv_filtered(self):
+        lines = self.mklinks("-f", "tsv", "--dedup", "-g", "*.md", "-g", "b.txt", "-a", "b")
+        self.assertEqual(lines, ["B\tA", "C\tB"])
+
+    def test_sizes_at_least_one(self):
+        for option in ("--buffer-size", "--memory-limit"):
+            for value in ("0", "-1"):
+                with self.assertRaises(SystemExit), redirect_stderr(StringIO()):
+                    notes.get_arguments(["links", option, value])
@@ -44,30 +44,38 @@ class Anchor:
 
     Instance attributes:
 
-    :displayname: Human readable name for this anchor.
+    :name: Human readable name for this anchor.
     :path: Path to the file this anchor refers to.
-    :address: string that identifies a location in that file
+    :definition: the string that defined the anchor, which identifies
+                 its location in that file
+    :aliases: set of other names by which to find this anchor
 
     This class is for reference only, and therefore presumed
     to never change.
+
+        >>> p = AnchorParser()
+        >>> p.path = "a.txt"
+        >>> list(p.parse("This is |(an) anchor|."))
+        [Anchor(name='(an) anchor', path='a.txt')]
     """
 
-    def __init__(self, displayname, path, address):
+    def __init__(self, name, path, definition, aliases=None):
         """Create an anchor."""
-        self.displayname = displayname
+        self.name = name
         self.path = path
-        self.address = address
+        self.definition = definition
+        self.aliases = aliases or set()
 
     def __eq__(self, other):
         return hash(self) == hash(other)
 
     def __hash__(self):
-        return hash("".join((self.displayname, self.path, self.address)))
+        return hash((self.name, self.path, self.definition))
 
     def __repr__(self):
         return "{}(name='{}', path='{}')".format(
                 self.__class__.__name__,
-                self.displayname,
+                self.name,
                 self.path)
 
 class AnchorTagRenderer:
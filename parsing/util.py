@@ -166,14 +166,32 @@ class Parser:
 
 
 class MultiParser(Parser):
+    r"""Combines several parsers into one.
+
+    Each match is handed to the parser that defined it, with ``path``
+    set as it would have been if that parser was used on its own.
+    Matches can span lines, just like with the individual parsers::
+
+        >>> from parsing.anchors import AnchorParser
+        >>> from parsing.references import ReferenceParser
+        >>> p = MultiParser(AnchorParser(), ReferenceParser())
+        >>> p.path = "somefile.txt"
+        >>> for item in p.parse("A |multi\nline anchor| and a ^multi\nline ref^"):
+        ...     print(type(item).__name__, repr(item.definition))
+        Anchor '|multi\nline anchor|'
+        Reference '^multi\nline ref^'
+    """
+
     def __init__(self, *parsers):
         self.parsers = parsers
         regex = '|'.join(('(?:'+p.regex.pattern+')' for p in parsers))
-        self.regex = re.compile(regex)
+        self.regex = re.compile(regex, flags=re.M|re.S)
+        self.path = None
 
     def postprocess_match(self, match):
         groupdict = match.groupdict()
         for p in self.parsers:
             klass = p.__class__.__name__
             if groupdict[klass]:
+                p.path = self.path
                 return p.postprocess_match(match)
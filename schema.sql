@@ -0,0 +1,22 @@
+-- Anchors, identified by the file they are in and their address within it.
+CREATE TABLE displaynames (
+    path        TEXT NOT NULL,
+    address     TEXT NOT NULL,
+    displayname TEXT NOT NULL,
+    UNIQUE (path, address)
+);
+
+-- All names by which an anchor can be found (including its displayname).
+CREATE TABLE names (
+    name    TEXT NOT NULL COLLATE collate_lowercase,
+    path    TEXT NOT NULL,
+    address TEXT NOT NULL,
+    UNIQUE (name, path, address),
+    FOREIGN KEY (path, address) REFERENCES displaynames (path, address)
+);
+
+CREATE INDEX names_by_location ON names (path, address);
+
+CREATE VIEW anchors AS
+    SELECT names.name, displaynames.displayname, displaynames.path, displaynames.address
+    FROM names JOIN displaynames USING (path, address);
@@ -0,0 +1,333 @@
+"""Provides a memory-mapped binary snapshot of the notebook index.
+
+A snapshot holds the same information as the database (anchors, the
+names by which they can be found, and the references made from them),
+but in a form that can be ``mmap``'ed and binary-searched without any
+parsing on load.
+
+All integers are unsigned little endian, 32 bits wide. The layout is::
+
+    header    magic, version, section counts and offsets (see ``HEADER``)
+    offsets   one offset per string into the blob, plus the end offset
+    blob      all strings, UTF-8 encoded, sorted and without duplicates
+    keys      (key, anchor) pairs, sorted by key
+    anchors   (displayname, path, address,
+               names start, names count, refs start, refs count)
+    names     alias groups: string ids, grouped by anchor
+    refs      reference targets: string ids, grouped by anchor
+
+Strings are interned and sorted, so a string's id orders the same way
+as the string itself. Keys are the lowercased names, which makes lookups
+case insensitive, just like in the database.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+from bisect import bisect_left
+
+MAGIC = b'NSNP'
+VERSION = 1
+
+HEADER = struct.Struct('<4sHH11I')
+UINT = struct.Struct('<I')
+KEY = struct.Struct('<II')
+ANCHOR = struct.Struct('<7I')
+
+
+class SnapshotWriter:
+    """Collects anchors and references, and writes them as a snapshot.
+
+    >>> w = SnapshotWriter()
+    >>> w.define_anchor("A", "a.txt", "|A|", {"AAA"})
+    >>> w.add_reference("a.txt", "|A|", "B")
+    >>> len(w.anchors), len(w.refs)
+    (1, 1)
+    """
+
+    def __init__(self):
+        self.anchors = {}
+        self.refs = {}
+
+    def define_anchor(self, displayname, path, address, names=None):
+        """Add an anchor; same arguments as ``DB.define_anchor()``.
+
+        Raises a ``ValueError`` when this combination of
+        ``path`` and ``address`` already exists.
+        """
+        if (path, address) in self.anchors:
+            raise ValueError("anchor already defined: {} {}".format(path, address))
+        names = set(names) if names else set()
+        names.add(displayname)
+        self.anchors[path, address] = (displayname, names)
+
+    def add_reference(self, path, address, target):
+        """Record a reference to ``target`` made from the given anchor.
+
+        Raises a ``ValueError`` when no anchor with this combination of
+        ``path`` and ``address`` has been defined yet.
+        """
+        if (path, address) not in self.anchors:
+            raise ValueError("anchor not defined: {} {}".format(path, address))
+        self.refs.setdefault((path, address), []).append(target)
+
+    def to_bytes(self):
+        """Return the snapshot as a ``bytes`` object."""
+        anchors = sorted(self.anchors.items())
+
+        strings = set()
+        for (path, address), (displayname, names) in anchors:
+            strings.update((path, address, displayname))
+            strings.update(names)
+            strings.update(name.lower() for name in names)
+        for targets in self.refs.values():
+            strings.update(targets)
+        strings = sorted(strings)
+        ids = {s: i for i, s in enumerate(strings)}
+
+        blob = bytearray()
+        offsets = bytearray()
+        for s in strings:
+            offsets += UINT.pack(len(blob))
+            blob += s.encode('utf-8')
+        offsets += UINT.pack(len(blob))
+
+        keys = set()
+        table = bytearray()
+        names_section = bytearray()
+        refs_section = bytearray()
+        for anchor_id, ((path, address), (displayname, names)) in enumerate(anchors):
+            name_ids = sorted(ids[name] for name in names)
+            targets = self.refs.get((path, address), [])
+            table += ANCHOR.pack(ids[displayname], ids[path], ids[address],
+                                 len(names_section) // UINT.size, len(name_ids),
+                                 len(refs_section) // UINT.size, len(targets))
+            for name_id in name_ids:
+                names_section += UINT.pack(name_id)
+            for target in targets:
+                refs_section += UINT.pack(ids[target])
+            keys.update((ids[name.lower()], anchor_id) for name in names)
+
+        keys_section = b''.join(KEY.pack(*k) for k in sorted(keys))
+
+        sections = [offsets, blob, keys_section, table, names_section, refs_section]
+        position = HEADER.size
+        starts = []
+        for section in sections:
+            starts.append(position)
+            position += len(section)
+
+        header = HEADER.pack(MAGIC, VERSION, 0,
+                             len(strings), starts[0], starts[1],
+                             len(keys), starts[2],
+                             len(anchors), starts[3],
+                             len(names_section) // UINT.size, starts[4],
+                             len(refs_section) // UINT.size, starts[5])
+        return header + b''.join(sections)
+
+    def write(self, path):
+        """Atomically write the snapshot to ``path``.
+
+        The data goes to a temporary file in the same directory first,
+        which then replaces ``path``, so readers never see a partial
+        snapshot. The file gets the same permissions as any other file
+        created with ``open()``, not the owner-only ones of ``mkstemp()``.
+        """
+        data = self.to_bytes()
+        directory = os.path.dirname(os.path.abspath(path))
+        handle, temppath = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        umask = os.umask(0)
+        os.umask(umask)
+        try:
+            with os.fdopen(handle, 'wb') as f:
+                os.fchmod(f.fileno(), 0o666 & ~umask)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temppath, path)
+        except BaseException:
+            os.remove(temppath)
+            raise
+
+
+class Snapshot:
+    """Read-only access to a snapshot written by ``SnapshotWriter``.
+
+    >>> import os
+    >>> from tempfile import mkstemp
+    >>> handle, path = mkstemp()
+    >>> os.close(handle)
+
+    >>> w = SnapshotWriter()
+    >>> w.define_anchor("A", "a.txt", "|A|", {"AAA", "Aaaaaa"})
+    >>> w.write(path)
+
+    >>> snap = Snapshot(path)
+    >>> snap.find_anchors("aaa")
+    [('A', 'a.txt', '|A|')]
+    >>> sorted(snap.get_anchor_names("a.txt", "|A|"))
+    ['A', 'AAA', 'Aaaaaa']
+    >>> snap.close()
+    >>> os.remove(path)
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self.map) < HEADER.size:
+            self.close()
+            raise ValueError("not a snapshot: {}".format(path))
+        (magic, version, _,
+         self.string_count, self.offsets_start, self.blob_start,
+         self.key_count, self.keys_start,
+         self.anchor_count, self.anchors_start,
+         names_count, self.names_start,
+         refs_count, self.refs_start) = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError("not a snapshot: {}".format(path))
+        if version != VERSION:
+            self.close()
+            raise ValueError("unsupported snapshot version {} (expected {})"
+                             .format(version, VERSION))
+
+        sections = [(self.offsets_start, (self.string_count + 1) * UINT.size),
+                    (self.keys_start, self.key_count * KEY.size),
+                    (self.anchors_start, self.anchor_count * ANCHOR.size),
+                    (self.names_start, names_count * UINT.size),
+                    (self.refs_start, refs_count * UINT.size)]
+        if all(start + size <= len(self.map) for start, size in sections):
+            blob_size, = UINT.unpack_from(self.map, self.offsets_start
+                                                    + self.string_count * UINT.size)
+            sections.append((self.blob_start, blob_size))
+        if any(start < HEADER.size or start + size > len(self.map)
+               for start, size in sections):
+            self.close()
+            raise ValueError("truncated snapshot: {}".format(path))
+
+        self._strings = _StringTable(self)
+        self._keys = _KeyColumn(self)
+        self._locations = _LocationColumn(self)
+
+    def close(self):
+        self.map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def string(self, string_id):
+        """Return the interned string with the given id."""
+        return self._strings[string_id].decode('utf-8')
+
+    def string_id(self, string):
+        """Return the id of ``string``, or ``None`` if it isn't interned."""
+        encoded = string.encode('utf-8')
+        i = bisect_left(self._strings, encoded)
+        if i < self.string_count and self._strings[i] == encoded:
+            return i
+        return None
+
+    def _anchor(self, anchor_id):
+        return ANCHOR.unpack_from(self.map, self.anchors_start + anchor_id * ANCHOR.size)
+
+    def _uints(self, start, index, count):
+        return struct.unpack_from('<{}I'.format(count), self.map, start + index * UINT.size)
+
+    def _find_anchor_ids(self, name):
+        key_id = self.string_id(name.lower())
+        if key_id is None:
+            return
+        i = bisect_left(self._keys, key_id)
+        while i < self.key_count:
+            found_key, anchor_id = KEY.unpack_from(self.map, self.keys_start + i * KEY.size)
+            if found_key != key_id:
+                break
+            yield anchor_id
+            i += 1
+
+    def _anchor_id(self, path, address):
+        key = (self.string_id(path), self.string_id(address))
+        if None in key:
+            return None
+        i = bisect_left(self._locations, key)
+        if i < self.anchor_count and self._locations[i] == key:
+            return i
+        return None
+
+    def find_anchors(self, name):
+        """Find an anchor by name (case insensitive).
+
+        Returns a list of ``(displayname, path, address)`` tuples.
+        """
+        results = []
+        for anchor_id in self._find_anchor_ids(name):
+            displayname_id, path_id, address_id, *_ = self._anchor(anchor_id)
+            results.append((self.string(displayname_id),
+                            self.string(path_id),
+                            self.string(address_id)))
+        return results
+
+    def get_anchor_names(self, path, address):
+        """Find all names for the given anchor."""
+        anchor_id = self._anchor_id(path, address)
+        if anchor_id is None:
+            return
+        *_, names_index, names_count, _, _ = self._anchor(anchor_id)
+        for name_id in self._uints(self.names_start, names_index, names_count):
+            yield self.string(name_id)
+
+    def get_references(self, path, address):
+        """Return the targets of all references made from the given anchor."""
+        anchor_id = self._anchor_id(path, address)
+        if anchor_id is None:
+            return
+        *_, refs_index, refs_count = self._anchor(anchor_id)
+        for target_id in self._uints(self.refs_start, refs_index, refs_count):
+            yield self.string(target_id)
+
+
+class _StringTable:
+    """Sequence view of the raw (encoded) strings, for use with ``bisect``."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.string_count
+
+    def __getitem__(self, i):
+        snap = self.snapshot
+        start, end = struct.unpack_from('<2I', snap.map, snap.offsets_start + i * UINT.size)
+        return snap.map[snap.blob_start + start:snap.blob_start + end]
+
+
+class _KeyColumn:
+    """Sequence view of the key column, for use with ``bisect``."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.key_count
+
+    def __getitem__(self, i):
+        snap = self.snapshot
+        return UINT.unpack_from(snap.map, snap.keys_start + i * KEY.size)[0]
+
+
+class _LocationColumn:
+    """Sequence view of the anchors' ``(path, address)`` ids, for use with ``bisect``."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def __len__(self):
+        return self.snapshot.anchor_count
+
+    def __getitem__(self, i):
+        return self.snapshot._anchor(i)[1:3]
@@ -0,0 +1,117 @@
+#!/bin/env python3
+"""Compare time-to-first-lookup of the snapshot, notes.db and the tags file.
+
+Builds a synthetic notebook index of ``--anchors`` anchors in a temporary
+directory, writes it in all three formats, and then measures how long it
+takes to open each one and answer a single name lookup.
+
+The cold time is the first lookup in a fresh process (the median over
+``--processes`` processes), which pays for loading pages and building
+rows. The warm time is the best of ``--repeat`` lookups in this process.
+Both run with the files in the OS page cache, since dropping it needs
+root.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser, SUPPRESS
+
+import db
+from snapshot import Snapshot, SnapshotWriter
+
+def make_anchors(count):
+    """Yield ``(displayname, path, address, names)`` tuples."""
+    for i in range(count):
+        name = "Anchor {}".format(i)
+        yield (name, "note{}.txt".format(i % 100), "|{}|".format(name),
+               {"Alias {}".format(i), "Other alias {}".format(i)})
+
+def lookup_snapshot(path, name):
+    with Snapshot(path) as snap:
+        return snap.find_anchors(name)
+
+def lookup_db(path, name):
+    notes = db.DB(path)
+    try:
+        return notes.find_anchors(name)
+    finally:
+        notes.close()
+
+def lookup_tags(path, name):
+    with open(path) as f:
+        return [line for line in f if line.split('\t', 1)[0] == name]
+
+LOOKUPS = {
+    "snapshot": lookup_snapshot,
+    "notes.db": lookup_db,
+    "tags": lookup_tags,
+}
+
+def time_lookup(label, path, name):
+    func = LOOKUPS[label]
+    start = time.perf_counter()
+    result = func(path, name)
+    seconds = time.perf_counter() - start
+    assert result, "{} lookup of {!r} found nothing".format(label, name)
+    return seconds
+
+def cold(processes, label, path, name):
+    """Median time of the first lookup in each of ``processes`` fresh processes."""
+    times = []
+    for _ in range(processes):
+        out = subprocess.run([sys.executable, __file__, "--cold-run", label, path, name],
+                             check=True, stdout=subprocess.PIPE, universal_newlines=True)
+        times.append(float(out.stdout))
+    return statistics.median(times)
+
+def warm(repeat, label, path, name):
+    """Best time of ``repeat`` lookups in this process."""
+    return min(time_lookup(label, path, name) for _ in range(repeat))
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--anchors", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=5)
+    parser.add_argument("--cold-run", nargs=3, help=SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_run:
+        print(time_lookup(*args.cold_run))
+        return
+
+    anchors = list(make_anchors(args.anchors))
+    name = next(iter(anchors[len(anchors) // 2][3]))
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = {
+            "snapshot": os.path.join(directory, "notes.snap"),
+            "notes.db": os.path.join(directory, "notes.db"),
+            "tags": os.path.join(directory, "tags"),
+        }
+
+        writer = SnapshotWriter()
+        notes = db.DB(paths["notes.db"])
+        notes.create_schema()
+        with open(paths["tags"], 'w') as tf:
+            for displayname, path, address, names in anchors:
+                writer.define_anchor(displayname, path, address, names)
+                notes.define_anchor(displayname, path, address, names)
+                for n in sorted(names | {displayname}):
+                    tf.write("{}\t{}\t{}\n".format(n, path, address))
+        writer.write(paths["snapshot"])
+        notes.close()
+
+        print("{:<10} {:>13} {:>13}".format("", "cold", "warm"))
+        for label, path in paths.items():
+            print("{:<10} {:10.1f} µs {:10.1f} µs".format(label,
+                    cold(args.processes, label, path, name) * 1e6,
+                    warm(args.repeat, label, path, name) * 1e6))
+
+
+if __name__ == "__main__":
+    main()
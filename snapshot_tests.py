@@ -0,0 +1,113 @@
+import unittest
+
+# The module we're testing.
+import snapshot
+
+# Additional modules
+import os
+import tempfile
+
+class TestFileSnapshot(unittest.TestCase):
+    """Tests for snapshots that have been written to disk."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "notes.snap")
+
+        writer = snapshot.SnapshotWriter()
+        writer.define_anchor(displayname="A", path="a.txt", address="|A|",
+                names={"Ah", "Ahaa!"})
+        writer.define_anchor(displayname="B", path="b.txt", address="|B|",
+                names={"Babe", "Bay, Michael"})
+        writer.define_anchor(displayname="Other A", path="a.txt", address="|Other A|",
+                names={"Ah", "Ahaahahah!"})
+        writer.add_reference("a.txt", "|A|", "B")
+        writer.add_reference("a.txt", "|A|", "Nowhere")
+        writer.write(self.path)
+
+        self.snap = snapshot.Snapshot(self.path)
+
+    def tearDown(self):
+        self.snap.close()
+        self.directory.cleanup()
+
+    def test_find_anchors(self):
+        results = set(self.snap.find_anchors("Ah"))
+        self.assertEqual(results, {("A", "a.txt", "|A|"),
+                                   ("Other A", "a.txt", "|Other A|")})
+
+    def test_find_anchors_displayname(self):
+        """Finding by displayname should also work."""
+        r1 = set(self.snap.find_anchors("B"))
+        r2 = set(self.snap.find_anchors("Babe"))
+        self.assertEqual(r1, r2)
+
+    def test_find_anchors_case(self):
+        """Anchor finding should be case insensitive."""
+        r1 = set(self.snap.find_anchors("B"))
+        r2 = set(self.snap.find_anchors("b"))  # Was never entered like that.
+        self.assertEqual(r1, r2)
+
+    def test_find_anchors_missing(self):
+        self.assertEqual(self.snap.find_anchors("C"), [])
+
+    def test_get_anchor_names(self):
+        names = set(self.snap.get_anchor_names("a.txt", "|A|"))
+        self.assertEqual(names, {"A", "Ah", "Ahaa!"})
+
+    def test_get_references(self):
+        targets = list(self.snap.get_references("a.txt", "|A|"))
+        self.assertEqual(targets, ["B", "Nowhere"])
+        self.assertEqual(list(self.snap.get_references("b.txt", "|B|")), [])
+
+    def test_uniqe_anchor(self):
+        writer = snapshot.SnapshotWriter()
+        writer.define_anchor("A", "a.txt", "|A|")
+        with self.assertRaisesRegex(ValueError, "anchor already defined"):
+            writer.define_anchor("A2", "a.txt", "|A|")
+
+    def test_reference_without_anchor(self):
+        writer = snapshot.SnapshotWriter()
+        with self.assertRaisesRegex(ValueError, "anchor not defined"):
+            writer.add_reference("a.txt", "|A|", "B")
+
+    def test_truncated(self):
+        """A snapshot cut short anywhere after the header is rejected."""
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for size in range(snapshot.HEADER.size, len(data)):
+            with open(self.path, 'wb') as f:
+                f.write(data[:size])
+            with self.assertRaisesRegex(ValueError, "truncated snapshot"):
+                snapshot.Snapshot(self.path)
+
+    def test_overwrite(self):
+        """Writing again replaces the old snapshot and leaves no temporary files behind."""
+        writer = snapshot.SnapshotWriter()
+        writer.define_anchor("C", "c.txt", "|C|")
+        writer.write(self.path)
+
+        self.assertEqual(os.listdir(self.directory.name), ["notes.snap"])
+        with snapshot.Snapshot(self.path) as snap:
+            self.assertEqual(snap.find_anchors("c"), [("C", "c.txt", "|C|")])
+            self.assertEqual(snap.find_anchors("A"), [])
+
+    def test_permissions(self):
+        """The snapshot is created with the same mode as other new files."""
+        otherpath = os.path.join(self.directory.name, "other")
+        with open(otherpath, 'w'):
+            pass
+        self.assertEqual(os.stat(self.path).st_mode, os.stat(otherpath).st_mode)
+
+    def test_wrong_version(self):
+        with open(self.path, 'r+b') as f:
+            f.seek(4)
+            f.write(snapshot.struct.pack('<H', snapshot.VERSION + 1))
+        with self.assertRaisesRegex(ValueError, "unsupported snapshot version"):
+            snapshot.Snapshot(self.path)
+
+    def test_not_a_snapshot(self):
+        with open(self.path, 'wb') as f:
+            f.write(b"!_TAG_FILE_FORMAT\t2\n" * 4)
+        with self.assertRaisesRegex(ValueError, "not a snapshot"):
+            snapshot.Snapshot(self.path)